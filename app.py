@@ -1,8 +1,21 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import requests
+import functools
 import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 from datetime import datetime
 
+try:
+    import orjson  # 선택 패키지: 설치되어 있으면 JSON 인코딩/디코딩에 사용
+except ImportError:
+    orjson = None
+
 BASE_URL = "https://qf3.qfactory.biz:8000"
 
 LOGIN_URL = f"{BASE_URL}/common/login/post-login"
@@ -13,6 +26,96 @@ STOCK_TRANSFER_LOT_LIST_URL = f"{BASE_URL}/inv/stock-transfer-warehouse/lot-list
 STOCK_TRANSFER_SAVE_URL = f"{BASE_URL}/inv/stock-transfer-warehouse/save"
 STOCK_TRANSFER_TRANSFER_URL = f"{BASE_URL}/inv/stock-transfer-warehouse/transfer"
 
+# 창고이동 경로 목록. 메인 메뉴 버튼과 이동 화면은 이 목록으로 만들어짐
+#   - key                 : current_page 값
+#   - transaction_type_id : SAVE payload 의 transactionTypeId
+#   - web_url_id          : SAVE payload 의 webUrlId / menuTreeId
+# PDA_ROUTES_PATH 에 같은 형식의 JSON 배열 파일을 지정하면 기본 목록 대신 사용
+# (transaction_type_id / web_url_id 를 생략하면 ROUTE_DEFAULTS 값 사용)
+ROUTE_DEFAULTS = {
+    "transaction_type_id": 10084,
+    "web_url_id": 13648,
+}
+DEFAULT_TRANSFER_ROUTES = [
+    {"key": "outsourcing_out", "name": "임가공 출고", "from_wh": "1WP", "to_wh": "1JO"},
+    {"key": "outsourcing_in", "name": "임가공 입고", "from_wh": "1JO", "to_wh": "1FGCK"},
+]
+
+
+def load_transfer_routes():
+    path = os.environ.get("PDA_ROUTES_PATH")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            routes = json.load(f)
+    else:
+        routes = DEFAULT_TRANSFER_ROUTES
+
+    result = []
+    seen_keys = set()
+    for route in routes:
+        missing = [k for k in ("key", "name", "from_wh", "to_wh") if not route.get(k)]
+        if missing:
+            raise RuntimeError(f"창고이동 경로 설정에 {', '.join(missing)} 값이 없습니다: {route!r}")
+        # key 는 current_page 와 세션 상태 키로 쓰이므로 중복 불가, "menu" 는 메인 메뉴용 예약어
+        if route["key"] == "menu" or route["key"] in seen_keys:
+            raise RuntimeError(f"창고이동 경로 key [{route['key']}] 은(는) 사용할 수 없습니다 (중복 또는 예약어).")
+        seen_keys.add(route["key"])
+        route = {**ROUTE_DEFAULTS, **route}
+        route["title"] = f"{route['name']} ({route['from_wh']} → {route['to_wh']})"
+        result.append(route)
+    return result
+
+
+TRANSFER_ROUTES = load_transfer_routes()
+ROUTES_BY_KEY = {route["key"]: route for route in TRANSFER_ROUTES}
+
+# 창고이동 전 사전검증: 창고 전체 LOT 재고를 페이지 단위로 한 번에 조회
+#   - 응답의 전체 건수(total)까지, 또는 빈 페이지가 나올 때까지 page 를 올려가며 조회
+#     (MES 가 limit 을 더 작게 잘라도 다음 페이지를 계속 읽음)
+VALIDATE_PAGE_SIZE = 500
+VALIDATE_MAX_PAGES = 40
+# 연속 스캔 micro-batch 에서만: 검증할 LOT 이 이 건수 이하면 창고 전체 대신 LOT 별로 조회
+VALIDATE_LOT_QUERY_MAX = 10
+
+# 조회 캐시 설정
+#   - PDA_CACHE_BACKEND=memory (기본값) : 프로세스 내부 dict
+#   - PDA_CACHE_BACKEND=sqlite          : PDA_CACHE_PATH 의 SQLite(WAL) 파일을 여러 프로세스가 공유
+CACHE_BACKEND = os.environ.get("PDA_CACHE_BACKEND", "memory").lower()
+CACHE_PATH = os.environ.get("PDA_CACHE_PATH", "pda_cache.sqlite3")
+
+# namespace 별 TTL(초). 재고 조회는 창고이동 완료 시 버전을 올려서 무효화함
+# (창고이동 헤더 / LOT 목록은 SAVE payload 에 그대로 들어가므로 캐시하지 않고 항상 새로 조회)
+CACHE_TTL = {
+    "warehouse": 600,
+    "route": 600,
+    "stock": 30,
+}
+STOCK_CACHE_NAMESPACES = ("stock",)
+# 빈 결과(None / 빈 목록)의 TTL(초). 여기에 없는 namespace 는 빈 결과를 캐시하지 않음
+# (MES 가 일시적으로 빈 창고 목록을 돌려줘도 다음 조회에서 다시 시도)
+CACHE_NEGATIVE_TTL = {
+    "stock": 5,
+}
+
+# LOT 잠금 설정 (기본값은 캐시와 같은 백엔드/파일 사용)
+#   - 스캔 시점에 lotCode 를 점유하고, 창고이동 완료/행 삭제/초기화 시 해제
+#   - LOT_LOCK_LEASE 초 동안 갱신이 없으면 다른 PDA 가 다시 점유할 수 있음
+LOCK_BACKEND = os.environ.get("PDA_LOCK_BACKEND", CACHE_BACKEND).lower()
+LOT_LOCK_LEASE = 600
+
+# 관리자 ID 목록 (쉼표 구분). 로그인 ID 가 여기에 있으면 화면 하단에 관리자 패널 표시
+ADMIN_USERS = {u.strip() for u in os.environ.get("PDA_ADMIN_USERS", "").split(",") if u.strip()}
+
+# 실행시간 프로파일 (PDA_PROFILE=1 일 때만 측정, 화면 하단의 관리자 패널에 표시)
+PROFILE_ENABLED = os.environ.get("PDA_PROFILE", "") == "1"
+
+# 연속 스캔 모드: 스캔된 행을 CONTINUOUS_BATCH_SIZE 건이 모이거나
+# 마지막 스캔 후 CONTINUOUS_IDLE_SECONDS 초가 지나면 백그라운드에서 자동 창고이동
+CONTINUOUS_BATCH_SIZE = 10
+CONTINUOUS_IDLE_SECONDS = 5.0
+# 대기 행이 없는 상태로 이 시간(초)이 지나면 백그라운드 스레드 종료 (화면이 다시 그려질 때 재시작)
+CONTINUOUS_THREAD_IDLE_EXIT = 300.0
+
 
 def parse_barcode(barcode: str):
     """
@@ -45,12 +148,148 @@ def parse_barcode(barcode: str):
     return item_code, lot_code, quantity
 
 
-def create_mes_session():
-    if "cookies" not in st.session_state or not st.session_state.cookies:
+def json_dumps(obj) -> str:
+    """MES 로 보내는 JSON 문자열 생성 (orjson 이 있으면 사용, 한글은 이스케이프하지 않음)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except TypeError:
+            pass  # orjson 이 처리하지 못하는 타입(64bit 초과 정수 등)은 표준 json 으로
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def json_loads(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def response_list(data: dict, fields=None):
+    """
+    MES 응답의 data.list 를 꺼냄 ("data": null 이거나 형식이 다르면 빈 리스트).
+    fields 를 주면 각 행에서 해당 필드만 남겨서, 캐시/세션에 큰 행을 통째로 들고 있지 않도록 함.
+    """
+    inner = data.get("data") or {}
+    if not isinstance(inner, dict):
+        return []
+    rows = inner.get("list") or []
+    if fields is None:
+        return rows
+    return [{f: row.get(f) for f in fields} for row in rows]
+
+
+_profile_local = threading.local()
+
+
+@contextmanager
+def profile_section(name: str):
+    """
+    이름 붙인 구간의 실행시간을 세션별/페이지별로 누적.
+      - profile_stats  : (페이지, 구간) -> 호출 수 / 합계 / 최대
+      - profile_folded : "페이지;rerun;구간;..." -> 자기시간(us)  (flame graph 용 folded 형식)
+    """
+    # 연속 스캔 모드의 백그라운드 스레드(세션 컨텍스트 없음)에서는 측정하지 않음
+    if not PROFILE_ENABLED or get_script_run_ctx(suppress_warning=True) is None:
+        yield
+        return
+
+    # 구간 중첩은 스레드별로 추적
+    stack = getattr(_profile_local, "stack", None)
+    if stack is None:
+        stack = _profile_local.stack = []
+    # 구간 도중에 페이지가 바뀔 수 있으므로(메뉴 클릭 후 st.rerun 등) 시작 시점의 페이지로 기록
+    page = st.session_state.get("current_page") or "login"
+    frame = [name, 0.0]  # [구간 이름, 하위 구간 시간 합계]
+    stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        path = ";".join(f[0] for f in stack)
+        stack.pop()
+        if stack:
+            stack[-1][1] += elapsed
+
+        stats = st.session_state.setdefault("profile_stats", {})
+        entry = stats.setdefault((page, name), {"count": 0, "total": 0.0, "max": 0.0})
+        entry["count"] += 1
+        entry["total"] += elapsed
+        entry["max"] = max(entry["max"], elapsed)
+
+        folded = st.session_state.setdefault("profile_folded", {})
+        key = f"{page};{path}"
+        folded[key] = folded.get(key, 0) + int((elapsed - frame[1]) * 1_000_000)
+
+
+def profiled(name: str):
+    """함수 전체를 profile_section 으로 감싸는 데코레이터."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_section(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def show_profile_panel():
+    if not PROFILE_ENABLED or not is_admin_user():
+        return
+
+    stats = st.session_state.get("profile_stats") or {}
+    with st.expander("⏱ 실행시간 프로파일 (관리자)"):
+        if not stats:
+            st.caption("측정된 구간이 없습니다.")
+            return
+
+        table_data = []
+        for (page, name), entry in sorted(stats.items(), key=lambda kv: kv[1]["total"], reverse=True):
+            table_data.append(
+                {
+                    "페이지": page,
+                    "구간": name,
+                    "호출 수": entry["count"],
+                    "합계(ms)": round(entry["total"] * 1000, 1),
+                    "평균(ms)": round(entry["total"] * 1000 / entry["count"], 1),
+                    "최대(ms)": round(entry["max"] * 1000, 1),
+                }
+            )
+        st.dataframe(table_data, use_container_width=True)
+
+        folded = st.session_state.get("profile_folded") or {}
+        st.download_button(
+            "flame graph 용 내보내기 (.folded)",
+            data="\n".join(f"{path} {us}" for path, us in folded.items()),
+            file_name=f"pda_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.folded",
+            mime="text/plain",
+        )
+        if st.button("프로파일 초기화", key="btn_profile_reset"):
+            st.session_state.profile_stats = {}
+            st.session_state.profile_folded = {}
+            st.rerun()
+
+
+def response_total(data: dict):
+    """MES 목록 응답의 전체 건수 (없으면 None)."""
+    inner = data.get("data") or {}
+    if not isinstance(inner, dict):
+        return None
+    for key in ("total", "totalCount"):
+        try:
+            return int(inner[key])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+def create_mes_session(mes_ctx=None):
+    cookies = mes_ctx["cookies"] if mes_ctx else st.session_state.get("cookies")
+    if not cookies:
         raise RuntimeError("로그인 정보가 없습니다. 먼저 로그인해 주세요.")
 
     session = requests.Session()
-    session.cookies.update(st.session_state.cookies)
+    session.cookies.update(cookies)
     headers = {
         "Accept": "*/*",
         "Content-Type": "application/json",
@@ -62,9 +301,14 @@ def create_mes_session():
     return session
 
 
-def mes_post(url: str, payload: dict):
-    session = create_mes_session()
-    resp = session.post(url, json=payload, timeout=15)
+def mes_post(url: str, payload: dict, mes_ctx=None):
+    with profile_section(f"mes_post {url[len(BASE_URL):]}"):
+        return _mes_post(url, payload, mes_ctx)
+
+
+def _mes_post(url: str, payload: dict, mes_ctx=None):
+    session = create_mes_session(mes_ctx)
+    resp = session.post(url, data=json_dumps(payload).encode("utf-8"), timeout=15)
 
     # 상태코드가 4xx/5xx 이면, MES 가 내려준 에러 내용을 그대로 올려보냄
     if resp.status_code >= 400:
@@ -74,7 +318,7 @@ def mes_post(url: str, payload: dict):
             detail = resp.text    # JSON 아니면 text 그대로
         raise RuntimeError(f"{url} 요청 실패 (status={resp.status_code}): {detail}")
 
-    data = resp.json()
+    data = json_loads(resp.content)
     if not isinstance(data, dict):
         raise RuntimeError("MES 응답 형식이 올바르지 않습니다.")
 
@@ -94,17 +338,346 @@ def mes_post(url: str, payload: dict):
     return data
 
 
-def ensure_warehouse_master():
-    if "warehouse_master" in st.session_state and st.session_state.warehouse_master:
+def sqlite_thread_conn(local: threading.local, path: str):
+    # Streamlit 은 세션마다 스레드가 다르므로 스레드별 커넥션 사용
+    conn = getattr(local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=5)
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        local.conn = conn
+    return conn
+
+
+class MemoryCacheBackend:
+    """프로세스 내부 캐시 (기본값). 같은 프로세스의 세션끼리만 공유됨."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+        self._versions = {}
+        self.stats = {"hits": 0, "misses": 0, "sets": 0, "invalidations": 0}
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] < now:
+                self._data.pop(key, None)
+                self.stats["misses"] += 1
+                return False, None
+            self.stats["hits"] += 1
+            return True, entry[0]
+
+    def set(self, key: str, value, ttl: float):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self.stats["sets"] += 1
+
+    def get_version(self, namespace: str) -> int:
+        with self._lock:
+            return self._versions.get(namespace, 0)
+
+    def bump_version(self, namespace: str):
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            self.stats["invalidations"] += 1
+            # 이전 버전 키는 더 이상 조회되지 않으므로 바로 정리
+            prefix = f"{namespace}:"
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats)
+
+
+class SqliteCacheBackend:
+    """SQLite(WAL) 파일 캐시. 같은 파일을 쓰는 여러 Streamlit 프로세스가 데이터를 공유함."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # hit/miss 는 조회마다 쓰지 않고 모아 두었다가 STATS_FLUSH_SECONDS 마다 파일에 반영
+        self._pending_stats = {}
+        self._last_flush = time.time()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_version ("
+            " namespace TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_stats ("
+            " name TEXT PRIMARY KEY, count INTEGER NOT NULL)"
+        )
+        conn.commit()
+
+    def _conn(self):
+        return sqlite_thread_conn(self._local, self.path)
+
+    STATS_FLUSH_SECONDS = 5
+
+    def _count(self, name: str, flush: bool = False):
+        with self._lock:
+            self._pending_stats[name] = self._pending_stats.get(name, 0) + 1
+            if not flush and time.time() - self._last_flush < self.STATS_FLUSH_SECONDS:
+                return
+            pending, self._pending_stats = self._pending_stats, {}
+            self._last_flush = time.time()
+        self._flush_stats(pending)
+
+    def _flush_stats(self, pending: dict):
+        if not pending:
+            return
+        conn = self._conn()
+        conn.executemany(
+            "INSERT INTO cache_stats (name, count) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET count = count + excluded.count",
+            list(pending.items()),
+        )
+        conn.commit()
+
+    def get_stats(self):
+        """모든 프로세스가 같은 파일에 누적한 통계."""
+        with self._lock:
+            pending, self._pending_stats = self._pending_stats, {}
+            self._last_flush = time.time()
+        self._flush_stats(pending)
+        stats = {"hits": 0, "misses": 0, "sets": 0, "invalidations": 0}
+        stats.update(self._conn().execute("SELECT name, count FROM cache_stats").fetchall())
+        return stats
+
+    def get(self, key: str):
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            self._count("misses")
+            return False, None
+        self._count("hits")
+        return True, json_loads(row[0])
+
+    def set(self, key: str, value, ttl: float):
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json_dumps(value), now + ttl),
+        )
+        # 만료된 행은 쓰기 때마다 함께 정리
+        conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+        conn.commit()
+        self._count("sets", flush=True)
+
+    def get_version(self, namespace: str) -> int:
+        row = self._conn().execute(
+            "SELECT version FROM cache_version WHERE namespace = ?", (namespace,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def bump_version(self, namespace: str):
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO cache_version (namespace, version) VALUES (?, 1) "
+            "ON CONFLICT(namespace) DO UPDATE SET version = version + 1",
+            (namespace,),
+        )
+        conn.execute("DELETE FROM cache WHERE key LIKE ?", (f"{namespace}:%",))
+        conn.commit()
+        self._count("invalidations", flush=True)
+
+
+@st.cache_resource
+def get_cache_backend():
+    # 프로세스당 1개만 생성 (모든 세션이 공유)
+    if CACHE_BACKEND == "sqlite":
+        return SqliteCacheBackend(CACHE_PATH)
+    return MemoryCacheBackend()
+
+
+def cache_get_or_load(namespace: str, key_parts, loader):
+    """
+    namespace + 현재 버전 + key_parts 로 캐시 키를 만들어 조회하고,
+    없으면 loader() 결과를 TTL 과 함께 저장해서 돌려줌.
+    (loader 결과가 None / 빈 값이면 CACHE_NEGATIVE_TTL 동안만 캐시하거나, 없으면 캐시하지 않음)
+    """
+    backend = get_cache_backend()
+    version = backend.get_version(namespace)
+    key = f"{namespace}:{version}:{json_dumps(key_parts)}"
+
+    found, value = backend.get(key)
+    if found:
+        return value
+
+    value = loader()
+    ttl = CACHE_TTL.get(namespace, 30) if value else CACHE_NEGATIVE_TTL.get(namespace)
+    if ttl:
+        backend.set(key, value, ttl)
+    return value
+
+
+def invalidate_cache(*namespaces: str, backend=None):
+    backend = backend or get_cache_backend()
+    for namespace in namespaces:
+        backend.bump_version(namespace)
+
+
+def is_admin_user():
+    return bool(st.session_state.get("user_key")) and st.session_state.user_key in ADMIN_USERS
+
+
+def show_cache_stats_panel():
+    if not is_admin_user():
         return
 
-    company_id = st.session_state.company_id
-    plant_id = st.session_state.plant_id
+    stats = get_cache_backend().get_stats()
+    lookups = stats["hits"] + stats["misses"]
+    with st.expander("🗄 조회 캐시 통계 (관리자)"):
+        if CACHE_BACKEND == "sqlite":
+            st.caption(f"백엔드: sqlite ({CACHE_PATH}, 모든 프로세스 합계)")
+        else:
+            st.caption("백엔드: memory (현재 프로세스)")
+        col_hit, col_miss, col_ratio, col_inv = st.columns(4)
+        col_hit.metric("hit", stats["hits"])
+        col_miss.metric("miss", stats["misses"])
+        col_ratio.metric("hit 비율", f"{stats['hits'] * 100 / lookups:.1f}%" if lookups else "-")
+        col_inv.metric("무효화", stats["invalidations"])
 
-    payload = {
+
+class MemoryLotLockTable:
+    """프로세스 내부 LOT 잠금 테이블 (기본값)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks = {}  # lotCode -> (owner, expires_at)
+
+    def claim(self, lot_code: str, owner: str, lease: float):
+        """
+        lotCode 를 owner 가 점유(또는 갱신). 이미 다른 owner 가 유효하게 점유 중이면 실패.
+        반환값: (성공 여부, 현재 점유자)
+        """
+        now = time.time()
+        with self._lock:
+            holder = self._locks.get(lot_code)
+            if holder and holder[0] != owner and holder[1] >= now:
+                return False, holder[0]
+            self._locks[lot_code] = (owner, now + lease)
+            return True, owner
+
+    def release(self, lot_codes, owner: str):
+        with self._lock:
+            for lot_code in lot_codes:
+                holder = self._locks.get(lot_code)
+                if holder and holder[0] == owner:
+                    del self._locks[lot_code]
+
+    def release_owner(self, owner: str):
+        with self._lock:
+            for lot_code in [k for k, v in self._locks.items() if v[0] == owner]:
+                del self._locks[lot_code]
+
+
+class SqliteLotLockTable:
+    """SQLite(WAL) LOT 잠금 테이블. 여러 Streamlit 프로세스가 같은 파일로 잠금을 공유함."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS lot_lock ("
+            " lot_code TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _conn(self):
+        return sqlite_thread_conn(self._local, self.path)
+
+    def claim(self, lot_code: str, owner: str, lease: float):
+        conn = self._conn()
+        now = time.time()
+        # 비어 있거나, 내가 점유 중이거나, 만료된 경우에만 덮어씀
+        conn.execute(
+            "INSERT INTO lot_lock (lot_code, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(lot_code) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+            "WHERE lot_lock.owner = excluded.owner OR lot_lock.expires_at < ?",
+            (lot_code, owner, now + lease, now),
+        )
+        conn.commit()
+        row = conn.execute("SELECT owner FROM lot_lock WHERE lot_code = ?", (lot_code,)).fetchone()
+        holder = row[0] if row else None
+        return holder == owner, holder
+
+    def release(self, lot_codes, owner: str):
+        conn = self._conn()
+        conn.executemany(
+            "DELETE FROM lot_lock WHERE lot_code = ? AND owner = ?",
+            [(lot_code, owner) for lot_code in lot_codes],
+        )
+        conn.commit()
+
+    def release_owner(self, owner: str):
+        conn = self._conn()
+        conn.execute("DELETE FROM lot_lock WHERE owner = ?", (owner,))
+        conn.commit()
+
+
+@st.cache_resource
+def get_lot_lock_table():
+    # 프로세스당 1개만 생성 (모든 세션이 공유)
+    if LOCK_BACKEND == "sqlite":
+        return SqliteLotLockTable(CACHE_PATH)
+    return MemoryLotLockTable()
+
+
+def claim_lots(lot_codes, mes_ctx=None):
+    """
+    현재 세션 이름으로 LOT 들을 점유(갱신). 다른 세션이 점유 중인 lotCode 목록을 반환
+    (빈 리스트면 모두 성공).
+    """
+    if mes_ctx:
+        table, owner = mes_ctx["locks"], mes_ctx["lock_owner"]
+    else:
+        table, owner = get_lot_lock_table(), st.session_state.lock_owner
+    conflicts = []
+    for lot_code in lot_codes:
+        ok, _ = table.claim(lot_code, owner, LOT_LOCK_LEASE)
+        if not ok:
+            conflicts.append(lot_code)
+    return conflicts
+
+
+def session_held_lots():
+    """이 세션이 아직 들고 있는 LOT (모든 경로의 수동 스캔 목록 + 연속 모드 대기/실패 행)."""
+    held = set()
+    for route in TRANSFER_ROUTES:
+        held.update(r["lotCode"] for r in st.session_state.get(f"transfer_rows_{route['key']}") or [])
+        committer = st.session_state.get(f"continuous_committer_{route['key']}")
+        if committer is not None:
+            held |= committer.held_lots()
+    return held
+
+
+def release_lots(lot_codes):
+    """
+    LOT 잠금 해제. 같은 세션의 다른 목록(다른 경로 포함)에 남아 있는 LOT 은 유지하므로,
+    목록에서 행을 먼저 뺀 다음 호출해야 함.
+    """
+    held = session_held_lots()
+    get_lot_lock_table().release([c for c in lot_codes if c not in held], st.session_state.lock_owner)
+
+
+# 조회 payload 중 고정 필드 템플릿 (companyId / plantId 는 세션별로 채움)
+PAYLOAD_TEMPLATES = {
+    "warehouse": {
         "languageCode": "KO",
-        "companyId": company_id,
-        "plantId": plant_id,
         "enabledFlag": "",
         "warehouseCode": "",
         "warehouseName": "",
@@ -123,43 +696,9 @@ def ensure_warehouse_master():
         "start": 1,
         "page": 1,
         "limit": 100,
-    }
-
-    data = mes_post(WAREHOUSE_LIST_URL, payload)
-    inner = data.get("data") or {}   # "data": null 인 경우도 대비
-    if isinstance(inner, dict):
-        wlist = inner.get("list") or []
-    else:
-        wlist = []
-    master = {}
-    for row in wlist:
-        code = row.get("warehouseCode")
-        if code:
-            master[code] = row
-    st.session_state.warehouse_master = master
-
-
-def get_warehouse_info(code: str):
-    ensure_warehouse_master()
-    master = st.session_state.get("warehouse_master")  # warehouse_master 가 없거나 None 인 경우 대비
-    if master is None:
-        raise RuntimeError("창고 마스터(warehouse_master)가 초기화되지 않았습니다.")
-    if not isinstance(master, dict):
-        raise RuntimeError(f"창고 마스터 형식이 올바르지 않습니다: {type(master)}")
-    info = master.get(code)
-    if not info:
-        raise RuntimeError(f"창고코드 {code} 에 해당하는 정보를 찾을 수 없습니다.")
-    return info
-
-
-def check_stock_by_lot(item_code: str, lot_code: str, warehouse_code: str):
-    company_id = st.session_state.company_id
-    plant_id = st.session_state.plant_id
-
-    payload = {
+    },
+    "stock": {
         "languageCode": "KO",
-        "companyId": company_id,
-        "plantId": plant_id,
         "itemCode": "",  # itemCode 조건은 빼고 lotCode + warehouseCode 로만 조회
         "itemName": "",
         "itemType": "",
@@ -168,7 +707,7 @@ def check_stock_by_lot(item_code: str, lot_code: str, warehouse_code: str):
         "productGroup": "",
         "itemClass1": "",
         "itemClass2": "",
-        "warehouseCode": warehouse_code,
+        "warehouseCode": "",
         "warehouseName": "",
         "warehouseLocationCode": "",
         "defectiveFlag": "Y",
@@ -179,21 +718,189 @@ def check_stock_by_lot(item_code: str, lot_code: str, warehouse_code: str):
         "creationDateFrom": "",
         "creationDateTo": "",
         "lotStatus": "",
-        "lotCode": lot_code,
+        "lotCode": "",
         "jobName": "",
         "partnerItem": "",
         "peopleName": "",
         "start": 1,
         "page": 1,
         "limit": "40",
+    },
+    "transfer_header": {
+        "warehouseCode": "",
+        "warehouseName": "",
+        "locationCode": "",
+        "locationName": "",
+        "itemCode": "",
+        "itemType": "",
+        "itemTypeName": "",
+        "productGroup": "",
+        "productGroupName": "",
+        "projectCode": "",
+        "projectName": "",
+        "itemName": "",
+        "languageCode": "KO",
+        "start": 1,
+        "page": 1,
+        "limit": "20",
+    },
+    "transfer_lot": {
+        "languageCode": "KO",
+        "itemId": 0,
+        "warehouseId": 0,
+        "locationId": 0,
+        "projectId": 0,
+        "effectiveStartDate": "",
+        "effectiveEndDate": "",
+        "start": 1,
+        "page": 1,
+        "limit": 25,
+    },
+}
+
+# 큰 목록 응답에서 실제로 사용하는 필드만 남김
+# (창고이동 헤더 / LOT 목록은 SAVE payload 에 그대로 들어가므로 전체 필드 유지)
+WAREHOUSE_FIELDS = ("warehouseId", "warehouseCode", "warehouseName")
+STOCK_ROW_FIELDS = (
+    "itemCode",
+    "itemName",
+    "lotCode",
+    "warehouseCode",
+    "warehouseName",
+    "onhandQuantity",
+    "primaryUom",
+)
+
+
+def build_payload(name: str, mes_ctx=None, **fields):
+    """
+    세션별로 한 번 만들어 둔 템플릿(고정 필드 + companyId/plantId)에
+    요청마다 달라지는 필드만 덮어써서 payload 를 만듦.
+    mes_ctx 를 주면 세션 상태를 건드리지 않고 그 값으로 만듦 (백그라운드 스레드용).
+    """
+    if mes_ctx:
+        return {
+            **PAYLOAD_TEMPLATES[name],
+            "companyId": mes_ctx["company_id"],
+            "plantId": mes_ctx["plant_id"],
+            **fields,
+        }
+
+    company_id = st.session_state.company_id
+    plant_id = st.session_state.plant_id
+
+    templates = st.session_state.get("payload_templates")
+    if not templates or templates.get("_org") != (company_id, plant_id):
+        templates = {"_org": (company_id, plant_id)}
+        for key, template in PAYLOAD_TEMPLATES.items():
+            templates[key] = {**template, "companyId": company_id, "plantId": plant_id}
+        st.session_state.payload_templates = templates
+
+    return {**templates[name], **fields}
+
+
+def ensure_warehouse_master():
+    if "warehouse_master" in st.session_state and st.session_state.warehouse_master:
+        return
+
+    company_id = st.session_state.company_id
+    plant_id = st.session_state.plant_id
+
+    def load():
+        data = mes_post(WAREHOUSE_LIST_URL, build_payload("warehouse"))
+        master = {}
+        for row in response_list(data, WAREHOUSE_FIELDS):
+            code = row.get("warehouseCode")
+            if code:
+                master[code] = row
+        return master
+
+    # 창고 마스터는 회사/공장 단위로 캐시 (다른 프로세스와도 공유 가능)
+    st.session_state.warehouse_master = cache_get_or_load("warehouse", [company_id, plant_id], load)
+
+
+def get_warehouse_info(code: str):
+    ensure_warehouse_master()
+    master = st.session_state.get("warehouse_master")  # warehouse_master 가 없거나 None 인 경우 대비
+    if master is None:
+        raise RuntimeError("창고 마스터(warehouse_master)가 초기화되지 않았습니다.")
+    if not isinstance(master, dict):
+        raise RuntimeError(f"창고 마스터 형식이 올바르지 않습니다: {type(master)}")
+    info = master.get(code)
+    if not info:
+        raise RuntimeError(f"창고코드 {code} 에 해당하는 정보를 찾을 수 없습니다.")
+    return info
+
+
+def get_route_binding(route: dict):
+    """
+    경로의 From/To 창고 마스터 행을 돌려줌.
+    회사/공장 단위로 경로별 결과를 세션과 공유 캐시에 저장하므로, 창고이동 때마다 다시 조회하지 않음.
+    (창고를 찾지 못한 경로는 저장하지 않고 다음 호출에서 다시 시도)
+    """
+    company_id = st.session_state.company_id
+    plant_id = st.session_state.plant_id
+
+    bindings = st.session_state.get("route_bindings")
+    if not bindings or bindings.get("_org") != [company_id, plant_id]:
+        bindings = {"_org": [company_id, plant_id]}
+        st.session_state.route_bindings = bindings
+
+    # 같은 key 라도 PDA_TRANSFER_ROUTES 로 창고가 바뀌면 다른 항목이 되도록 창고코드까지 키에 포함
+    route_id = [route["key"], route["from_wh"], route["to_wh"]]
+    memo_key = "|".join(route_id)
+
+    def matches(binding):
+        return (
+            isinstance(binding, dict)
+            and (binding.get("from") or {}).get("warehouseCode") == route["from_wh"]
+            and (binding.get("to") or {}).get("warehouseCode") == route["to_wh"]
+        )
+
+    binding = bindings.get(memo_key)
+    if matches(binding):
+        return binding
+
+    def load():
+        # 창고를 못 찾으면 get_warehouse_info 가 예외를 던지므로 캐시에 저장되지 않음
+        return {"from": get_warehouse_info(route["from_wh"]), "to": get_warehouse_info(route["to_wh"])}
+
+    binding = cache_get_or_load("route", [company_id, plant_id] + route_id, load)
+    if not matches(binding):
+        binding = load()
+    bindings[memo_key] = binding
+    return binding
+
+
+def capture_mes_context(route: dict):
+    """
+    창고이동에 필요한 세션 값 스냅샷 (쿠키, 회사/공장, LOT 잠금 주인, 목적 창고 등).
+    연속 스캔 모드의 백그라운드 스레드는 st.session_state 대신 이 값만 사용함.
+    """
+    if not st.session_state.get("cookies"):
+        raise RuntimeError("로그인 정보가 없습니다. 먼저 로그인해 주세요.")
+    return {
+        "cookies": dict(st.session_state.cookies),
+        "company_id": st.session_state.company_id,
+        "plant_id": st.session_state.plant_id,
+        "company_code": st.session_state.company_code,
+        "lock_owner": st.session_state.lock_owner,
+        "cache": get_cache_backend(),
+        "locks": get_lot_lock_table(),
+        "to_wh_info": get_route_binding(route)["to"],
     }
 
-    data = mes_post(STOCK_DETAIL_URL, payload)
-    inner = data.get("data") or {}   # "data": null 인 경우 대비
-    if isinstance(inner, dict):
-        dlist = inner.get("list") or []
-    else:
-        dlist = []
+
+def check_stock_by_lot(item_code: str, lot_code: str, warehouse_code: str):
+    company_id = st.session_state.company_id
+    plant_id = st.session_state.plant_id
+
+    def load():
+        payload = build_payload("stock", warehouseCode=warehouse_code, lotCode=lot_code)
+        data = mes_post(STOCK_DETAIL_URL, payload)
+        return response_list(data, STOCK_ROW_FIELDS)
+
+    dlist = cache_get_or_load("stock", [company_id, plant_id, warehouse_code, lot_code], load)
 
     if not dlist:  # 조회 결과가 완전히 없으면 그대로 None 리턴
         return None
@@ -212,231 +919,331 @@ def check_stock_by_lot(item_code: str, lot_code: str, warehouse_code: str):
     return dlist[0]
 
 
-def fetch_transfer_header(item_code: str, warehouse_code: str):
-    company_id = st.session_state.company_id
-    plant_id = st.session_state.plant_id
+def add_lot_onhand(onhand: dict, rows, warehouse_code: str):
+    """재고 조회 행들의 현재고를 onhand 의 LOT 별 합계에 더함 (다른 창고 행은 무시)."""
+    for row in rows:
+        lot_code = row.get("lotCode")
+        if not lot_code or row.get("warehouseCode") != warehouse_code:
+            continue
+        try:
+            qty = float(row.get("onhandQuantity") or 0)
+        except (TypeError, ValueError):
+            qty = 0
+        onhand[lot_code] = onhand.get(lot_code, 0) + qty
 
-    payload = {
-        "companyId": company_id,
-        "plantId": plant_id,
-        "warehouseCode": warehouse_code,
-        "warehouseName": "",
-        "locationCode": "",
-        "locationName": "",
-        "itemCode": item_code,
-        "itemType": "",
-        "itemTypeName": "",
-        "productGroup": "",
-        "productGroupName": "",
-        "projectCode": "",
-        "projectName": "",
-        "itemName": "",
-        "languageCode": "KO",
-        "start": 1,
-        "page": 1,
-        "limit": "20",
-    }
 
-    data = mes_post(STOCK_TRANSFER_LIST_URL, payload)
-    inner = data.get("data") or {}   # data 가 None 이거나 "data": null 인 경우 방어
-    if isinstance(inner, dict):
-        dlist = inner.get("list") or []
-    else:
-        dlist = []
+def fetch_warehouse_lot_stock(warehouse_code: str, mes_ctx=None):
+    """
+    창고의 LOT 별 현재고 합계를 조회 (lotCode 조건 없이 창고 전체를 페이지 단위로 조회).
+    사전검증 용도라 캐시를 거치지 않고 항상 MES 에서 새로 읽음.
+    반환값: {lotCode: 현재고 합계}
+    """
+    onhand = {}
+    fetched = 0
+    prev_page = None
+    for page in range(1, VALIDATE_MAX_PAGES + 1):
+        # start 는 템플릿 값 그대로 두고 page 만 올림 (브라우저 payload 와 같은 방식)
+        payload = build_payload(
+            "stock", mes_ctx, warehouseCode=warehouse_code, page=page, limit=str(VALIDATE_PAGE_SIZE)
+        )
+        data = mes_post(STOCK_DETAIL_URL, payload, mes_ctx)
+        dlist = response_list(data, STOCK_ROW_FIELDS)
+        if not dlist:
+            return onhand
+        if dlist == prev_page:
+            # page 를 무시하고 같은 행을 돌려주면 합계가 중복되므로 검증 불가로 처리
+            raise RuntimeError(f"창고 [{warehouse_code}] 재고 조회가 페이지 단위로 나뉘지 않아 사전검증을 할 수 없습니다.")
+        prev_page = dlist
+
+        add_lot_onhand(onhand, dlist, warehouse_code)
+
+        fetched += len(dlist)
+        total = response_total(data)
+        if total is not None and fetched >= total:
+            return onhand
+    raise RuntimeError(
+        f"창고 [{warehouse_code}] 재고가 너무 많아 사전검증을 끝내지 못했습니다 "
+        f"(최대 {VALIDATE_MAX_PAGES} 페이지)."
+    )
+
+
+def fetch_lot_onhand(lot_codes, warehouse_code: str, mes_ctx=None, per_lot: bool = False):
+    """
+    LOT 들의 현재고 합계를 캐시 없이 새로 조회. 반환값: {lotCode: 현재고 합계} (없는 LOT 은 빠짐)
+    기본은 창고 전체를 한 번에 조회. per_lot=True(연속 스캔 micro-batch)이고
+    LOT 이 VALIDATE_LOT_QUERY_MAX 건 이하일 때만 LOT 별로 조회.
+    """
+    lot_codes = set(lot_codes)
+    if not per_lot or len(lot_codes) > VALIDATE_LOT_QUERY_MAX:
+        return fetch_warehouse_lot_stock(warehouse_code, mes_ctx)
+
+    onhand = {}
+    for lot_code in lot_codes:
+        payload = build_payload("stock", mes_ctx, warehouseCode=warehouse_code, lotCode=lot_code)
+        dlist = response_list(mes_post(STOCK_DETAIL_URL, payload, mes_ctx), STOCK_ROW_FIELDS)
+        add_lot_onhand(onhand, [row for row in dlist if row.get("lotCode") == lot_code], warehouse_code)
+    return onhand
+
+
+def find_transfer_problems(rows, route: dict, mes_ctx=None, per_lot: bool = False):
+    """
+    창고이동 전에 스캔 행들을 현재 From 창고 재고와 비교.
+    같은 LOT 이 여러 번 스캔된 경우 수량을 합쳐서 확인하고, 문제를 LOT 별로 모아서 돌려줌
+    (빈 dict 면 통과).
+    """
+    requested = {}
+    for row in rows:
+        requested[row["lotCode"]] = requested.get(row["lotCode"], 0) + row["quantity"]
+    if not requested:
+        return {}
+
+    onhand = fetch_lot_onhand(requested, route["from_wh"], mes_ctx, per_lot)
+
+    problems = {}
+    for lot_code, qty in requested.items():
+        if lot_code not in onhand:
+            problems[lot_code] = f"LOT [{lot_code}] 이(가) From 창고 [{route['from_wh']}] 에 없습니다."
+        elif qty > onhand[lot_code]:
+            problems[lot_code] = f"LOT [{lot_code}] 재고부족: 현재고 {onhand[lot_code]}, 이동요청 {qty}"
+    return problems
+
+
+def validate_transfer_rows(rows, route: dict, mes_ctx=None):
+    """스캔 목록 전체의 사전검증 문제 목록 (빈 리스트면 통과)."""
+    return list(find_transfer_problems(rows, route, mes_ctx).values())
+
+
+def fetch_transfer_header(item_code: str, warehouse_code: str, mes_ctx=None):
+    payload = build_payload("transfer_header", mes_ctx, warehouseCode=warehouse_code, itemCode=item_code)
+    dlist = response_list(mes_post(STOCK_TRANSFER_LIST_URL, payload, mes_ctx))
     for row in dlist:
         if row.get("itemCode") == item_code and row.get("warehouseCode") == warehouse_code:
             return row
     return None
 
 
-def fetch_transfer_lot_list(item_id: int, warehouse_id: int):
-    company_id = st.session_state.company_id
-    plant_id = st.session_state.plant_id
+def fetch_transfer_lot_list(item_id: int, warehouse_id: int, mes_ctx=None):
+    payload = build_payload("transfer_lot", mes_ctx, itemId=item_id, warehouseId=warehouse_id)
+    return response_list(mes_post(STOCK_TRANSFER_LOT_LIST_URL, payload, mes_ctx))
 
-    payload = {
-        "languageCode": "KO",
-        "companyId": company_id,
-        "plantId": plant_id,
-        "itemId": item_id,
-        "warehouseId": warehouse_id,
-        "locationId": 0,
-        "projectId": 0,
-        "effectiveStartDate": "",
-        "effectiveEndDate": "",
-        "start": 1,
-        "page": 1,
-        "limit": 25,
-    }
 
-    data = mes_post(STOCK_TRANSFER_LOT_LIST_URL, payload)
-    inner = data.get("data") or {}
-    if isinstance(inner, dict):
-        return inner.get("list") or []
-    return []
+def transfer_rows(rows, route: dict, mes_ctx: dict, on_row_done=None, on_row_failed=None, per_lot: bool = False):
+    """
+    스캔 행들을 MES 에 창고이동 (SAVE -> TRANSFER, 행별 1건씩 순차 전송).
+    세션 값은 capture_mes_context() 로 만든 mes_ctx 에서만 읽고, 화면(st.error 등)도 건드리지 않으므로
+    연속 스캔 모드의 백그라운드 스레드에서도 사용함.
+      - on_row_done(row)          : 각 행의 TRANSFER 가 끝날 때마다 호출
+      - on_row_failed(row, 메시지) : 주면 잠금 충돌 / 사전검증 실패 / 전송 오류를 행 단위로 넘기고
+                                     나머지 행은 계속 전송. 없으면 전송 전 문제는 모두 모아서,
+                                     전송 중 오류는 그대로 RuntimeError 로 올림 (수동 창고이동)
+      - per_lot                   : 사전검증을 LOT 별 조회로 (연속 스캔 micro-batch 전용, fetch_lot_onhand 참고)
+    """
+    to_wh_info = mes_ctx["to_wh_info"]
+
+    # 스캔 때 점유한 LOT 잠금을 갱신. 그 사이 만료되어 다른 PDA 가 가져갔으면 전송 전에 중단
+    conflicts = claim_lots((row["lotCode"] for row in rows), mes_ctx)
+    if conflicts and on_row_failed is None:
+        raise RuntimeError(f"다른 PDA 에서 처리 중인 LOT 이 있습니다: {', '.join(conflicts)}")
+
+    problems = find_transfer_problems(rows, route, mes_ctx, per_lot)
+    for lot_code in conflicts:
+        problems[lot_code] = f"LOT [{lot_code}] 은(는) 다른 PDA 에서 처리 중입니다."
+    if problems:
+        if on_row_failed is None:
+            # 한 건이라도 문제가 있으면 아무것도 전송하지 않음 (중간까지만 이동되는 것 방지)
+            raise RuntimeError(
+                "사전검증 실패로 창고이동을 진행하지 않았습니다.\n\n" + "\n".join(f"- {p}" for p in problems.values())
+            )
+        for row in rows:
+            if row["lotCode"] in problems:
+                on_row_failed(row, problems[row["lotCode"]])
+        rows = [row for row in rows if row["lotCode"] not in problems]
+
+    now = datetime.now()
+    transaction_date = now.strftime("%Y-%m-%d %H:%M:%S")
+    period_date = now.strftime("%Y-%m")
+
+    # 행마다 같은 SAVE 헤더 필드
+    save_fields = {
+        # 프론트에서 사용하는 row-active 필드 (서버가 참조할 수도 있으므로 형태만 맞춤)
+        "row-active": True,
+        # 목적 창고 정보
+        "saveWarehouseId": to_wh_info.get("warehouseId"),
+        "saveWarehouseCode": to_wh_info.get("warehouseCode"),
+        "saveWarehouseName": to_wh_info.get("warehouseName"),
+        # 브라우저 payload 기준: saveLocationId / Code / Name 은 null 로 보냄
+        "saveLocationId": None,
+        "saveLocationCode": None,
+        "saveLocationName": None,
+        "editStatus": "U",
+        "errorField": {},
+        "transferWarehouseId": to_wh_info.get("warehouseId"),
+        "transactionTypeId": route["transaction_type_id"],
+        "transactionDate": transaction_date,
+        "periodDate": period_date,
+        "transferLocationId": 0,
+        "lotCount": 1,
+        "webUrlId": route["web_url_id"],
+        "interfaceFlag": "N",
+    }
 
+    # 여러 개의 행이 있어도, MES 에는 행별로 1건씩 순차 전송
+    for row in rows:
+        if on_row_failed is None:
+            transfer_one_row(row, route, mes_ctx, save_fields)
+        else:
+            try:
+                transfer_one_row(row, route, mes_ctx, save_fields)
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                on_row_failed(row, str(e))
+                continue
+        if on_row_done:
+            on_row_done(row)
+
+
+def transfer_one_row(row: dict, route: dict, mes_ctx: dict, save_fields: dict):
+    """스캔 행 1건을 SAVE -> TRANSFER. save_fields 는 transfer_rows 에서 만든 행 공통 SAVE 헤더 필드."""
+    from_wh_code = route["from_wh"]
+    company_id = mes_ctx["company_id"]
+    plant_id = mes_ctx["plant_id"]
+    company_code = mes_ctx["company_code"]
+    language_code = "KO"
+
+    item_code = row["itemCode"]
+    lot_code = row["lotCode"]
+    move_qty = row["quantity"]
+
+    header = fetch_transfer_header(item_code, from_wh_code, mes_ctx)
+    if not header:
+        raise RuntimeError(f"[{item_code}] / 창고 [{from_wh_code}] 의 재고 헤더 정보를 찾지 못했습니다.")
+
+    item_id = header.get("itemId")
+    warehouse_id = header.get("warehouseId")
+
+    lot_list = fetch_transfer_lot_list(item_id=item_id, warehouse_id=warehouse_id, mes_ctx=mes_ctx)
+    lot_row = None
+    for l in lot_list:
+        if l.get("lotCode") == lot_code:
+            lot_row = l
+            break
+
+    if not lot_row:
+        raise RuntimeError(f"LOT [{lot_code}] 의 창고이동 LOT 정보를 찾지 못했습니다.")
+
+    # 브라우저 SAVE payload 와 최대한 동일하게 맞추기
+    # (id 는 헤더에 없을 때만 python-... 값을 사용, 공통 필드는 루프 밖에서 한 번만 생성)
+    header_obj = {
+        "id": f"python-{item_code}-{lot_code}",
+        **header,
+        **save_fields,
+        # locationId / projectId 가 None 이면 0 으로 보정 (브라우저 payload 와 동일하게)
+        "locationId": header.get("locationId") or 0,
+        "projectId": header.get("projectId") or 0,
+        # 거래수량 = LOT 이동수량 합계와 같아야 하므로, 기본단위수량(primaryQuantity)을 이동수량으로 맞춤
+        "primaryQuantity": float(move_qty),
+        "saveMoveQuantity": move_qty,
+        "availableForLocationFlag": header.get("availableForLocationFlag", "N"),
+        "transferItemId": header.get("itemId"),
+        "transferPlantId": header.get("plantId", plant_id),
+    }
 
-def perform_transfer(rows, from_wh_code: str, to_wh_code: str):
-    # 디버그용 Traceback + 주요 데이터 출력
-    try:
-        if not rows:
-            st.warning("이동할 바코드가 없습니다.")
-            return
+    records_u = [header_obj]
 
-        ensure_warehouse_master()
-        to_wh_info = get_warehouse_info(to_wh_code)
+    lot_obj = {
+        "id": f"python-lot-{lot_row.get('lotId') or lot_row.get('lotCode')}",
+        **lot_row,
+        "editStatus": "U",
+        "moveQuantity": float(move_qty),
+        "onhandStockId": header.get("onhandStockId"),
+    }
+    records_u2 = [lot_obj]
 
-        company_id = st.session_state.company_id
-        plant_id = st.session_state.plant_id
-        company_code = st.session_state.company_code
-        language_code = "KO"
+    payload = {
+        "recordsI": "[]",
+        "recordsU": json_dumps(records_u),
+        "recordsU2": json_dumps(records_u2),
+        "recordsD": "[]",
+        "menuTreeId": str(route["web_url_id"]),
+        "companyCode": company_code,
+        "companyId": company_id,
+        "languageCode": language_code,
+    }
 
-        now = datetime.now()
-        transaction_date = now.strftime("%Y-%m-%d %H:%M:%S")
-        period_date = now.strftime("%Y-%m")
+    # 디버그: SAVE 요청 payload를 콘솔에 출력
+    print("=== DEBUG SAVE payload ===")
+    try:
+        print(json_dumps(payload))
+    except Exception:
+        print(payload)
+    print("=== END DEBUG SAVE payload ===")
 
-        # 여러 개의 행이 있어도, MES 에는 행별로 1건씩 순차 전송
-        for row in rows:
-            item_code = row["itemCode"]
-            lot_code = row["lotCode"]
-            move_qty = row["quantity"]
-            stock_row = row["stock_row"]
-
-            header = fetch_transfer_header(item_code, from_wh_code)
-            if not header:
-                st.error(f"[{item_code}] / 창고 [{from_wh_code}] 의 재고 헤더 정보를 찾지 못했습니다.")
-                return
+    save_data = mes_post(STOCK_TRANSFER_SAVE_URL, payload, mes_ctx)
+    if not isinstance(save_data, dict):
+        raise RuntimeError(f"창고이동 SAVE 응답 형식이 올바르지 않습니다: {save_data!r}")
 
-            item_id = header.get("itemId")
-            warehouse_id = header.get("warehouseId")
+    # 디버그: SAVE 응답
+    print("=== DEBUG SAVE response ===")
+    try:
+        print(json_dumps(save_data))
+    except Exception:
+        print(save_data)
+    print("=== END DEBUG SAVE response ===")
 
-            lot_list = fetch_transfer_lot_list(item_id=item_id, warehouse_id=warehouse_id)
-            lot_row = None
-            for l in lot_list:
-                if l.get("lotCode") == lot_code:
-                    lot_row = l
-                    break
+    data_field = save_data.get("data")
+    if isinstance(data_field, dict):
+        transfer_tmp_id = data_field.get("list")  # {"list": 14720} 형태
+    else:
+        transfer_tmp_id = data_field
+    if not transfer_tmp_id:
+        raise RuntimeError("save 처리 후 transferTmpId 를 받지 못했습니다.")
 
-            if not lot_row:
-                st.error(f"LOT [{lot_code}] 의 창고이동 LOT 정보를 찾지 못했습니다.")
-                return
+    transfer_payload = {
+        "companyId": company_id,
+        "transferTmpId": transfer_tmp_id,
+        "companyCode": company_code,
+        "languageCode": language_code,
+    }
 
-            # 브라우저 SAVE payload 와 최대한 동일하게 맞추기
-            header_obj = dict(header)
-
-            # locationId / projectId 가 None 이면 0 으로 보정 (브라우저 payload 와 동일하게)
-            header_obj["locationId"] = header.get("locationId") or 0
-            header_obj["projectId"] = header.get("projectId") or 0
-
-            # 거래수량 = LOT 이동수량 합계와 같아야 하므로, 기본단위수량(primaryQuantity)을 이동수량으로 맞춤
-            header_obj["primaryQuantity"] = float(move_qty)
-
-            # 프론트에서 사용하는 id / row-active 필드 추가 (서버가 참조할 수도 있으므로 형태만 맞춤)
-            if "id" not in header_obj:
-                header_obj["id"] = f"python-{item_code}-{lot_code}"
-            header_obj["row-active"] = True
-
-            # 목적 창고 정보
-            header_obj["saveWarehouseId"] = to_wh_info.get("warehouseId")
-            header_obj["saveWarehouseCode"] = to_wh_info.get("warehouseCode")
-            header_obj["saveWarehouseName"] = to_wh_info.get("warehouseName")
-
-            # 브라우저 payload 기준: saveLocationId / Code / Name 은 null 로 보냄
-            header_obj["saveLocationId"] = None
-            header_obj["saveLocationCode"] = None
-            header_obj["saveLocationName"] = None
-
-            header_obj["saveMoveQuantity"] = move_qty
-            header_obj["editStatus"] = "U"
-            header_obj["errorField"] = {}
-            header_obj["transferWarehouseId"] = to_wh_info.get("warehouseId")
-            header_obj["transactionTypeId"] = 10084
-            header_obj["transactionDate"] = transaction_date
-            header_obj["periodDate"] = period_date
-            header_obj["availableForLocationFlag"] = header.get("availableForLocationFlag", "N")
-            header_obj["transferLocationId"] = 0
-            header_obj["lotCount"] = 1
-            header_obj["transferItemId"] = header.get("itemId")
-            header_obj["transferPlantId"] = header.get("plantId", plant_id)
-            header_obj["webUrlId"] = 13648
-            header_obj["interfaceFlag"] = "N"
-
-            records_u = [header_obj]
-
-            lot_obj = dict(lot_row)
-            if "id" not in lot_obj:
-                lot_obj["id"] = f"python-lot-{lot_obj.get('lotId') or lot_obj.get('lotCode')}"
-            lot_obj["editStatus"] = "U"
-            lot_obj["moveQuantity"] = float(move_qty)
-            lot_obj["onhandStockId"] = header.get("onhandStockId")
-            records_u2 = [lot_obj]
-
-            payload = {
-                "recordsI": json.dumps([], ensure_ascii=False),
-                "recordsU": json.dumps(records_u, ensure_ascii=False),
-                "recordsU2": json.dumps(records_u2, ensure_ascii=False),
-                "recordsD": json.dumps([], ensure_ascii=False),
-                "menuTreeId": "13648",
-                "companyCode": company_code,
-                "companyId": company_id,
-                "languageCode": language_code,
-            }
+    # 디버그: TRANSFER payload
+    print("=== DEBUG TRANSFER payload ===")
+    try:
+        print(json_dumps(transfer_payload))
+    except Exception:
+        print(transfer_payload)
+    print("=== END DEBUG TRANSFER payload ===")
 
-            # 디버그: SAVE 요청 payload를 콘솔에 출력
-            print("=== DEBUG SAVE payload ===")
-            try:
-                print(json.dumps(payload, ensure_ascii=False))
-            except Exception:
-                print(payload)
-            print("=== END DEBUG SAVE payload ===")
+    transfer_resp = mes_post(STOCK_TRANSFER_TRANSFER_URL, transfer_payload, mes_ctx)
 
-            save_data = mes_post(STOCK_TRANSFER_SAVE_URL, payload)
-            if not isinstance(save_data, dict):
-                raise RuntimeError(f"창고이동 SAVE 응답 형식이 올바르지 않습니다: {save_data!r}")
+    # 재고가 바뀌었으므로 재고/이동 관련 캐시 무효화 (다른 프로세스에도 반영됨)
+    invalidate_cache(*STOCK_CACHE_NAMESPACES, backend=mes_ctx["cache"])
 
-            # 디버그: SAVE 응답
-            print("=== DEBUG SAVE response ===")
-            try:
-                print(json.dumps(save_data, ensure_ascii=False))
-            except Exception:
-                print(save_data)
-            print("=== END DEBUG SAVE response ===")
-
-            data_field = save_data.get("data")
-            if isinstance(data_field, dict):
-                transfer_tmp_id = data_field.get("list")  # {"list": 14720} 형태
-            else:
-                transfer_tmp_id = data_field
-            if not transfer_tmp_id:
-                st.error("save 처리 후 transferTmpId 를 받지 못했습니다.")
-                return
+    # 디버그: TRANSFER 응답
+    print("=== DEBUG TRANSFER response ===")
+    try:
+        print(json_dumps(transfer_resp))
+    except Exception:
+        print(transfer_resp)
+    print("=== END DEBUG TRANSFER response ===")
 
-            transfer_payload = {
-                "companyId": company_id,
-                "transferTmpId": transfer_tmp_id,
-                "companyCode": company_code,
-                "languageCode": language_code,
-            }
 
-            # 디버그: TRANSFER payload
-            print("=== DEBUG TRANSFER payload ===")
-            try:
-                print(json.dumps(transfer_payload, ensure_ascii=False))
-            except Exception:
-                print(transfer_payload)
-            print("=== END DEBUG TRANSFER payload ===")
+@profiled("perform_transfer")
+def perform_transfer(rows, route: dict):
+    from_wh_code = route["from_wh"]
+    to_wh_code = route["to_wh"]
 
-            transfer_resp = mes_post(STOCK_TRANSFER_TRANSFER_URL, transfer_payload)
+    # 디버그용 Traceback + 주요 데이터 출력
+    try:
+        if not rows:
+            st.warning("이동할 바코드가 없습니다.")
+            return
 
-            # 디버그: TRANSFER 응답
-            print("=== DEBUG TRANSFER response ===")
-            try:
-                print(json.dumps(transfer_resp, ensure_ascii=False))
-            except Exception:
-                print(transfer_resp)
-            print("=== END DEBUG TRANSFER response ===")
+        transfer_rows(rows, route, capture_mes_context(route))
 
         st.success("창고이동이 완료되었습니다.")
-        st.session_state[f"transfer_rows_{from_wh_code}_{to_wh_code}"] = []
+        st.session_state[f"transfer_rows_{route['key']}"] = []
+        release_lots([row["lotCode"] for row in rows])
     except Exception:
         # 여기서 전체 Traceback 과 주요 상태를 PowerShell 에 출력
         import traceback
@@ -449,6 +1256,210 @@ def perform_transfer(rows, from_wh_code: str, to_wh_code: str):
         raise
 
 
+class ContinuousCommitter:
+    """
+    연속 스캔 모드의 세션별 자동 창고이동 큐.
+    스캔 행은 pending 에 쌓이고, 백그라운드 스레드가 micro-batch 단위로 transfer_rows 를 호출함.
+    스레드는 st.session_state 를 건드리지 않고, start() 때 받은 capture_mes_context() 스냅샷만 사용.
+    """
+
+    def __init__(self, route: dict, batch_size: int, idle_seconds: float):
+        self.route = route
+        self.batch_size = batch_size
+        self.idle_seconds = idle_seconds
+        self._mes_ctx = None
+        self._cond = threading.Condition()
+        self._pending = []
+        self._in_flight = []
+        self._failed = []  # (row, 오류 메시지)
+        self._committed_count = 0
+        self._last_scan = 0.0
+        self._stopping = False
+        self._thread = None
+
+    def start(self, mes_ctx: dict):
+        with self._cond:
+            # 다음 micro-batch 부터는 최신 스냅샷 사용 (재로그인 등으로 쿠키가 바뀐 경우)
+            self._mes_ctx = mes_ctx
+            self._stopping = False
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run,
+                name=f"continuous-commit-{self.route['key']}",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self, discard: bool = False):
+        """남은 pending 을 바로 전송한 뒤 스레드 종료 (discard=True 면 pending 을 버리고 종료)."""
+        with self._cond:
+            if discard:
+                self._pending = []
+            self._stopping = True
+            self._cond.notify_all()
+
+    def join(self):
+        """진행 중인 micro-batch 가 끝나고 스레드가 종료될 때까지 대기."""
+        with self._cond:
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def add(self, row: dict):
+        with self._cond:
+            self._pending.append(row)
+            self._last_scan = time.time()
+            self._cond.notify_all()
+
+    def held_lots(self):
+        with self._cond:
+            rows = self._pending + self._in_flight + [r for r, _ in self._failed]
+            return {r["lotCode"] for r in rows}
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                "committed": self._committed_count,
+                "pending": len(self._pending) + len(self._in_flight),
+                "failed": list(self._failed),
+            }
+
+    def retry_failed(self):
+        with self._cond:
+            self._pending.extend(r for r, _ in self._failed)
+            self._failed = []
+            self._last_scan = time.time()
+            self._cond.notify_all()
+
+    def clear_failed(self):
+        """실패 행을 비우고 그 lotCode 목록을 반환 (잠금 해제는 호출하는 쪽에서 release_lots 로)."""
+        with self._cond:
+            lot_codes = [r["lotCode"] for r, _ in self._failed]
+            self._failed = []
+        return lot_codes
+
+    def _next_batch(self):
+        timed_out = False
+        with self._cond:
+            while True:
+                if self._pending:
+                    idle = time.time() - self._last_scan
+                    if self._stopping or len(self._pending) >= self.batch_size or idle >= self.idle_seconds:
+                        batch = self._pending[: self.batch_size]
+                        del self._pending[: self.batch_size]
+                        self._in_flight = batch
+                        return batch, self._mes_ctx
+                    self._cond.wait(self.idle_seconds - idle)
+                elif self._stopping or timed_out:
+                    # 세션이 로그아웃 없이 끝나도 스레드가 남지 않도록 종료 (start() 가 다시 띄움)
+                    self._thread = None
+                    return None, None
+                else:
+                    timed_out = not self._cond.wait(CONTINUOUS_THREAD_IDLE_EXIT)
+
+    def _run(self):
+        while True:
+            batch, mes_ctx = self._next_batch()
+            if batch is None:
+                return
+
+            # 문제 있는 행만 실패로 빼고 나머지는 계속 전송
+            done = []
+            failed = []
+            try:
+                transfer_rows(
+                    batch,
+                    self.route,
+                    mes_ctx,
+                    on_row_done=done.append,
+                    on_row_failed=lambda row, msg: failed.append((row, msg)),
+                    per_lot=True,
+                )
+            except Exception as e:
+                # 사전검증 조회 자체가 실패한 경우 등: 아직 처리되지 않은 행을 모두 실패로
+                import traceback
+                print("========== CONTINUOUS COMMIT DEBUG TRACEBACK ==========")
+                traceback.print_exc()
+                print("batch:", batch)
+                print("========== END CONTINUOUS COMMIT DEBUG TRACEBACK ==========")
+                handled = {id(r) for r in done} | {id(r) for r, _ in failed}
+                failed.extend((r, str(e)) for r in batch if id(r) not in handled)
+
+            with self._cond:
+                self._committed_count += len(done)
+                self._failed.extend(failed)
+                self._in_flight = []
+                # 같은 LOT 이 대기/실패 행에 남아 있으면 잠금 유지
+                held = {r["lotCode"] for r in self._pending} | {r["lotCode"] for r, _ in self._failed}
+            mes_ctx["locks"].release(
+                [r["lotCode"] for r in done if r["lotCode"] not in held], mes_ctx["lock_owner"]
+            )
+
+
+def get_continuous_committer(route: dict):
+    key = f"continuous_committer_{route['key']}"
+    committer = st.session_state.get(key)
+    if committer is None:
+        committer = ContinuousCommitter(route, CONTINUOUS_BATCH_SIZE, CONTINUOUS_IDLE_SECONDS)
+        st.session_state[key] = committer
+    return committer
+
+
+def stop_continuous_committers():
+    for route in TRANSFER_ROUTES:
+        committer = st.session_state.get(f"continuous_committer_{route['key']}")
+        if committer is not None:
+            committer.stop(discard=True)
+    # 전송 중인 micro-batch 가 끝날 때까지 기다린 뒤 세션 정보를 지움 (중간까지만 이동되는 것 방지)
+    for route in TRANSFER_ROUTES:
+        committer = st.session_state.get(f"continuous_committer_{route['key']}")
+        if committer is not None:
+            committer.join()
+
+
+@st.fragment(run_every=1.0)
+def show_continuous_status(committer: ContinuousCommitter):
+    snap = committer.snapshot()
+
+    col_done, col_pending, col_failed = st.columns(3)
+    col_done.metric("이동완료", snap["committed"])
+    col_pending.metric("대기/전송중", snap["pending"])
+    col_failed.metric("실패", len(snap["failed"]))
+
+    if snap["failed"]:
+        table_data = []
+        for idx, (r, msg) in enumerate(snap["failed"], start=1):
+            table_data.append(
+                {
+                    "No": idx,
+                    "품목코드": r["itemCode"],
+                    "LOT NO": r["lotCode"],
+                    "수량": r["quantity"],
+                    "오류": msg,
+                }
+            )
+        st.dataframe(table_data, use_container_width=True)
+
+        col_retry, col_clear = st.columns(2)
+        with col_retry:
+            if st.button("실패 행 다시 전송", key=f"btn_retry_{committer.route['key']}"):
+                try:
+                    mes_ctx = capture_mes_context(committer.route)
+                except Exception as e:
+                    # 실패 행은 그대로 두고 스레드도 띄우지 않음
+                    st.error(f"다시 전송하지 못했습니다: {e}")
+                else:
+                    committer.retry_failed()
+                    committer.start(mes_ctx)
+                    if not st.session_state.get(f"continuous_{committer.route['key']}"):
+                        # 연속 모드가 꺼져 있으면 다시 전송만 하고 스레드 종료
+                        committer.stop()
+        with col_clear:
+            if st.button("실패 행 비우기", key=f"btn_clear_failed_{committer.route['key']}"):
+                release_lots(committer.clear_failed())
+
+
 def login_to_mes(user_id: str, password: str):
     payload = {
         "companyCode": "BWC40601",
@@ -486,9 +1497,12 @@ def login_to_mes(user_id: str, password: str):
     return True, data, cookies, {"userInfo": user_info, "orgInfo": org_info}
 
 
+@profiled("init_session_state")
 def init_session_state():
     if "logged_in" not in st.session_state:
         st.session_state.logged_in = False
+    if "user_key" not in st.session_state:
+        st.session_state.user_key = None
     if "user_info" not in st.session_state:
         st.session_state.user_info = None
     if "org_info" not in st.session_state:
@@ -505,8 +1519,11 @@ def init_session_state():
         st.session_state.plant_id = None
     if "company_code" not in st.session_state:
         st.session_state.company_code = "BWC40601"
+    if "lock_owner" not in st.session_state:
+        st.session_state.lock_owner = uuid.uuid4().hex
 
 
+@profiled("apply_dark_theme")
 def apply_dark_theme():
     st.set_page_config(page_title="QFactory PDA", page_icon="📦", layout="centered")
     st.markdown(
@@ -544,6 +1561,7 @@ def apply_dark_theme():
     )
 
 
+@profiled("show_login_page")
 def show_login_page():
     st.title("QFactory PDA 로그인")
     st.write("ID / PW 를 입력해서 MES 에 로그인합니다.")
@@ -574,6 +1592,7 @@ def show_login_page():
 
         st.session_state.logged_in = True
         st.session_state.cookies = cookies
+        st.session_state.user_key = user_id
         st.session_state.user_info = infos["userInfo"]
         st.session_state.org_info = infos["orgInfo"]
         st.session_state.company_id = infos["userInfo"].get("companyId")
@@ -585,6 +1604,7 @@ def show_login_page():
         st.rerun()
 
 
+@profiled("show_main_menu")
 def show_main_menu():
     user_info = st.session_state.get("user_info") or {}
     user_name = user_info.get("userName") or ""
@@ -607,24 +1627,25 @@ def show_main_menu():
     container = st.container()
     with container:
         st.markdown('<div class="big-menu">', unsafe_allow_html=True)
-        out_btn = st.button("임가공 출고 (1WP → 1JO)", use_container_width=True, key="btn_out")
-        st.write("")
-        in_btn = st.button("임가공 입고 (1JO → 1FGCK)", use_container_width=True, key="btn_in")
-        st.write("")
+        route_btns = {}
+        for route in TRANSFER_ROUTES:
+            route_btns[route["key"]] = st.button(route["title"], use_container_width=True, key=f"btn_route_{route['key']}")
+            st.write("")
         logout_btn = st.button("로그아웃", use_container_width=True, key="btn_logout")
         st.markdown("</div>", unsafe_allow_html=True)
 
-    if out_btn:
-        st.session_state.current_page = "outsourcing_out"
-        st.rerun()
-
-    if in_btn:
-        st.session_state.current_page = "outsourcing_in"
-        st.rerun()
+    for route_key, clicked in route_btns.items():
+        if clicked:
+            st.session_state.current_page = route_key
+            st.rerun()
 
     if logout_btn:
+        with st.spinner("진행 중인 자동 창고이동을 마무리하는 중..."):
+            stop_continuous_committers()
+        get_lot_lock_table().release_owner(st.session_state.lock_owner)
         for key in (
             "logged_in",
+            "user_key",
             "user_info",
             "org_info",
             "cookies",
@@ -632,6 +1653,9 @@ def show_main_menu():
             "warehouse_master",
             "company_id",
             "plant_id",
+            "lock_owner",
+            "payload_templates",
+            "route_bindings",
         ):
             if key in st.session_state:
                 del st.session_state[key]
@@ -639,25 +1663,42 @@ def show_main_menu():
         st.rerun()
 
 
-def show_transfer_page(mode: str):
-    if mode == "out":
-        title = "임가공 출고 (1WP → 1JO)"
-        from_wh = "1WP"
-        to_wh = "1JO"
-    else:
-        title = "임가공 입고 (1JO → 1FGCK)"
-        from_wh = "1JO"
-        to_wh = "1FGCK"
+@profiled("show_transfer_page")
+def show_transfer_page(route: dict):
+    title = route["title"]
+    from_wh = route["from_wh"]
+    to_wh = route["to_wh"]
 
-    rows_key = f"transfer_rows_{from_wh}_{to_wh}"
+    rows_key = f"transfer_rows_{route['key']}"
     if rows_key not in st.session_state:
         st.session_state[rows_key] = []
 
     st.markdown(f"### {title}")
     st.caption(f"From 창고: {from_wh} / To 창고: {to_wh}")
 
-    barcode_key = f"barcode_input_{from_wh}_{to_wh}"
+    barcode_key = f"barcode_input_{route['key']}"
+    continuous_key = f"continuous_{route['key']}"
 
+    continuous = st.toggle(
+        f"연속 스캔 모드 ({CONTINUOUS_BATCH_SIZE}건 또는 {CONTINUOUS_IDLE_SECONDS:g}초 대기 시 자동 창고이동)",
+        key=continuous_key,
+    )
+    committer = get_continuous_committer(route)
+    if continuous:
+        try:
+            committer.start(capture_mes_context(route))
+        except Exception as e:
+            # 로그인 만료 / 창고 마스터 조회 실패 등: 스레드는 멈춘 채로 두고 화면에만 표시
+            committer.stop()
+            st.error(f"연속 스캔 모드를 시작하지 못했습니다: {e}")
+    else:
+        committer.stop()
+
+    # 화면이 다시 그려질 때마다(스캔 포함) 이 세션이 들고 있는 LOT 잠금을 모두 갱신.
+    # 스캔 없이 LOT_LOCK_LEASE 가 지나 다른 PDA 가 가져간 LOT 은 목록에 표시
+    lost_lots = set(claim_lots(session_held_lots()))
+
+    @profiled("handle_barcode_scan")
     def handle_barcode_scan():
         raw = st.session_state.get(barcode_key, "").strip()
         if not raw:
@@ -670,16 +1711,26 @@ def show_transfer_page(mode: str):
             st.session_state[barcode_key] = ""
             return
 
+        # 다른 PDA 가 같은 LOT 을 잡고 있으면 재고조회 없이 바로 거절
+        if claim_lots([lot_code]):
+            st.error(f"LOT [{lot_code}] 은(는) 다른 PDA 에서 스캔 중입니다.")
+            st.session_state[barcode_key] = ""
+            return
+
+        def reject(msg: str):
+            # 이 스캔으로 새로 잡은 잠금이면 해제 (목록에 같은 LOT 이 이미 있으면 유지)
+            release_lots([lot_code])
+            st.error(msg)
+            st.session_state[barcode_key] = ""
+
         try:
             stock_row = check_stock_by_lot(item_code=item_code, lot_code=lot_code, warehouse_code=from_wh)
         except Exception as e:
-            st.error(f"재고조회 중 오류: {e}")
-            st.session_state[barcode_key] = ""
+            reject(f"재고조회 중 오류: {e}")
             return
 
         if not stock_row:
-            st.error("From 창고에 해당 LOT 재고가 없습니다.")
-            st.session_state[barcode_key] = ""
+            reject("From 창고에 해당 LOT 재고가 없습니다.")
             return
 
         onhand_qty = stock_row.get("onhandQuantity", 0)
@@ -689,8 +1740,7 @@ def show_transfer_page(mode: str):
             onhand_qty_float = 0
 
         if quantity > onhand_qty_float:
-            st.error(f"From 창고 재고부족: LOT 재고 {onhand_qty_float}, 이동요청 {quantity}")
-            st.session_state[barcode_key] = ""
+            reject(f"From 창고 재고부족: LOT 재고 {onhand_qty_float}, 이동요청 {quantity}")
             return
 
         new_row = {
@@ -707,7 +1757,10 @@ def show_transfer_page(mode: str):
             "stock_row": stock_row,
         }
 
-        st.session_state[rows_key].append(new_row)
+        if st.session_state.get(continuous_key):
+            committer.add(new_row)
+        else:
+            st.session_state[rows_key].append(new_row)
         st.session_state[barcode_key] = ""
 
     st.text_input(
@@ -736,8 +1789,25 @@ def show_transfer_page(mode: str):
 
     rows = st.session_state[rows_key]
 
-    st.markdown("#### 스캔 목록")
-    if rows:
+    # 모드를 꺼도 대기/실패 행이 남아 있으면(LOT 잠금도 유지 중) 계속 보여 줌
+    snap = committer.snapshot()
+    if continuous or snap["pending"] or snap["failed"]:
+        st.markdown("#### 연속 스캔 현황")
+        if not continuous:
+            st.caption("연속 스캔 모드가 꺼져 있습니다. 남은 실패 행을 다시 전송하거나 비워 주세요.")
+        show_continuous_status(committer)
+
+    if continuous:
+        if rows:
+            st.info(f"수동 스캔 목록 {len(rows)}건은 연속 스캔 모드를 끄면 다시 표시됩니다.")
+    elif rows:
+        st.markdown("#### 스캔 목록")
+        lost_rows = sorted({r["lotCode"] for r in rows} & lost_lots)
+        if lost_rows:
+            st.warning(
+                f"잠금이 만료되어 다른 PDA 에서 처리 중인 LOT 이 있습니다: {', '.join(lost_rows)} "
+                "(삭제 후 다시 스캔해 주세요)"
+            )
         table_data = []
         for idx, r in enumerate(rows, start=1):
             table_data.append(
@@ -751,10 +1821,12 @@ def show_transfer_page(mode: str):
                     "To 창고": r["toWarehouse"],
                     "From 재고": r["onhandQuantity"],
                     "단위": r.get("uom"),
+                    "잠금": "만료" if r["lotCode"] in lost_lots else "",
                 }
             )
 
-        st.dataframe(table_data, use_container_width=True)
+        with profile_section("st.dataframe"):
+            st.dataframe(table_data, use_container_width=True)
 
         delete_index = None
         if len(rows) > 0:
@@ -762,47 +1834,64 @@ def show_transfer_page(mode: str):
             selected_no = st.selectbox("삭제할 행 번호 선택", idx_options)
             delete_index = selected_no - 1
 
-        col_left, col_center, col_right = st.columns([1, 1, 2])
+        col_left, col_center, col_check, col_right = st.columns([1, 1, 1, 2])
         with col_left:
-            if st.button("삭제", key=f"btn_delete_{from_wh}_{to_wh}"):
+            if st.button("삭제", key=f"btn_delete_{route['key']}"):
                 if delete_index is not None and 0 <= delete_index < len(st.session_state[rows_key]):
-                    st.session_state[rows_key].pop(delete_index)
+                    removed = st.session_state[rows_key].pop(delete_index)
+                    release_lots([removed["lotCode"]])
                     st.success("선택한 행을 삭제했습니다.")
                     st.rerun()
         with col_center:
-            if st.button("초기화", key=f"btn_reset_{from_wh}_{to_wh}"):
+            if st.button("초기화", key=f"btn_reset_{route['key']}"):
+                removed = st.session_state[rows_key]
                 st.session_state[rows_key] = []
+                release_lots([r["lotCode"] for r in removed])
                 st.success("스캔 목록을 초기화했습니다.")
                 st.rerun()
+        with col_check:
+            if st.button("사전검증", key=f"btn_validate_{route['key']}"):
+                try:
+                    problems = validate_transfer_rows(rows, route)
+                except Exception as e:
+                    st.error(f"사전검증 중 오류: {e}")
+                else:
+                    if problems:
+                        st.error("\n".join(f"- {p}" for p in problems))
+                    else:
+                        st.success("모든 LOT 의 현재고가 충분합니다.")
         with col_right:
-            if st.button("창고이동", key=f"btn_transfer_{from_wh}_{to_wh}"):
+            if st.button("창고이동", key=f"btn_transfer_{route['key']}"):
                 try:
-                    perform_transfer(rows, from_wh_code=from_wh, to_wh_code=to_wh)
+                    perform_transfer(rows, route)
                 except Exception as e:
                     st.error(f"창고이동 처리 중 오류: {e}")
     else:
+        st.markdown("#### 스캔 목록")
         st.info("스캔된 바코드가 없습니다. 바코드를 스캔해 주세요.")
 
-    if st.button("◀ 메인 메뉴로", key=f"btn_back_{from_wh}_{to_wh}"):
+    if st.button("◀ 메인 메뉴로", key=f"btn_back_{route['key']}"):
         st.session_state.current_page = "menu"
         st.rerun()
 
 
 def main():
-    apply_dark_theme()
-    init_session_state()
+    with profile_section("rerun"):
+        apply_dark_theme()
+        init_session_state()
+        show_current_page()
+    show_profile_panel()
+    show_cache_stats_panel()
 
+
+def show_current_page():
     if not st.session_state.logged_in:
         show_login_page()
         return
 
-    page = st.session_state.current_page
-    if page == "menu":
-        show_main_menu()
-    elif page == "outsourcing_out":
-        show_transfer_page("out")
-    elif page == "outsourcing_in":
-        show_transfer_page("in")
+    route = ROUTES_BY_KEY.get(st.session_state.current_page)
+    if route:
+        show_transfer_page(route)
     else:
         show_main_menu()
 